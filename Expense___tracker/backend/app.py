@@ -1,43 +1,83 @@
 from flask import Flask, request, jsonify, session
 from flask_cors import CORS
+from flask_caching import Cache
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import select, or_, and_
+from sqlalchemy.orm import load_only, raiseload
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError, InvalidHashError
 import fitz  # PyMuPDF
-import pytesseract
-from pdfminer.high_level import extract_text
-from PIL import Image
 import io
-import re
+import logging
 import os
 import time
 import traceback
 from typing import List, Dict, Any
-from datetime import datetime
+from datetime import datetime, date
 import uuid
+import hmac
+import hashlib
+import secrets
+import threading
+import orjson
+from cachetools import TTLCache
+
+# Shared precompiled transaction patterns
+from regex_cache import iter_phonepe_records, normalize_ws
+
+# OCR backend (tesserocr when installed, pytesseract otherwise)
+from ocr_engine import pdf_page_texts
 
 # Import Paytm processor functions
-from paytmapp import parse_paytm_transactions, is_text_based as paytm_is_text_based, ocr_pdf as paytm_ocr_pdf
+from paytmapp import parse_paytm_transactions, page_text_rows
+
+# Keep uploaded files in memory instead of spooling them to disk
+from upload_request import InMemoryUploadRequest
+
+# Content-hash cache for upload results
+from content_cache import ContentCache, content_key
 
 # File upload processor functions (moved inline)
-def extract_pdf_data(file_path: str) -> List[Dict[str, Any]]:
+def extract_pdf_data(file_bytes: bytes) -> List[Dict[str, Any]]:
     """Extract data from PDF files."""
     try:
-        text = extract_text(file_path)
+        with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+            text = "\n".join(page.get_text("text") for page in doc)
         return [{"text": text, "type": "pdf"}]
     except Exception as e:
         return [{"error": str(e), "type": "pdf"}]
 
-def extract_excel_data(file_path: str) -> List[Dict[str, Any]]:
+def _sheet_records(df) -> List[Dict[str, Any]]:
+    """Spreadsheet rows as records, cleaned column-wise in pandas."""
+    # Drop fully blank rows/columns (padding around the table) before any
+    # per-row Python objects are built
+    df = df.dropna(how='all').dropna(axis=1, how='all')
+    # Empty cells become None rather than NaN, which is not valid JSON
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict('records')
+
+def extract_excel_data(file_bytes: bytes) -> List[Dict[str, Any]]:
     """Extract data from Excel files."""
     try:
         import pandas as pd
-        df = pd.read_excel(file_path)
-        return df.to_dict('records')
+        return _sheet_records(pd.read_excel(io.BytesIO(file_bytes)))
     except Exception as e:
         return [{"error": str(e), "type": "excel"}]
 
+def extract_csv_data(file_bytes: bytes) -> List[Dict[str, Any]]:
+    """Extract data from CSV files."""
+    try:
+        import pandas as pd
+        return _sheet_records(pd.read_csv(io.BytesIO(file_bytes)))
+    except Exception as e:
+        return [{"error": str(e), "type": "csv"}]
+
 app = Flask(__name__)
+app.request_class = InMemoryUploadRequest
 CORS(app, supports_credentials=True, origins=[
     "http://localhost:5173",  # Local dev
     "https://the-expense-exterminator-oh37.vercel.app/"  # Deployed frontend
@@ -50,18 +90,72 @@ if database_url.startswith('postgres://'):
     database_url = database_url.replace('postgres://', 'postgresql://', 1)
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Uploads are processed in memory; reject anything larger than a statement
+# could reasonably be (Werkzeug answers 413)
+app.config['MAX_CONTENT_LENGTH'] = 32 * 1024 * 1024
+if database_url.startswith('postgresql://'):
+    # Keep warm connections and transparently replace ones dropped while idle
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_pre_ping': True,
+        'pool_recycle': 1800
+    }
 
 CORS(app, supports_credentials=True)  # Enable CORS for all routes with credentials
 
+logger = logging.getLogger(__name__)
+
+# Background queue for PDF processing (RQ). Opt-in with PDF_QUEUE_ENABLED=1
+# (plus REDIS_URL and a running `rq worker`), since queued uploads answer 202
+# with a job id to poll; otherwise PDFs are processed inside the request.
+task_queue = None
+if os.environ.get('PDF_QUEUE_ENABLED', '').lower() in ('1', 'true') and os.environ.get('REDIS_URL'):
+    from redis import Redis
+    from rq import Queue
+    task_queue = Queue(connection=Redis.from_url(os.environ['REDIS_URL']))
+
 # Initialize extensions
 db = SQLAlchemy(app)
+
+# Short-lived response cache, only with Redis: an in-process cache would be
+# per gunicorn worker, so an invalidation after a write would only reach the
+# worker that handled it and other workers would keep serving stale lists
+if os.environ.get('REDIS_URL'):
+    cache = Cache(app, config={'CACHE_TYPE': 'RedisCache', 'CACHE_REDIS_URL': os.environ['REDIS_URL']})
+else:
+    cache = Cache(app, config={'CACHE_TYPE': 'NullCache'})
+
+# Raise on lazy-load (N+1) query patterns during development only
+if os.environ.get('FLASK_ENV') == 'development':
+    try:
+        from nplusone.ext.flask_sqlalchemy import NPlusOne
+        app.config['NPLUSONE_RAISE'] = True
+        NPlusOne(app)
+    except ImportError:
+        logger.warning("nplusone not installed, N+1 query detection disabled")
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+# Password hashing: argon2id with a cost tuned to keep login well under 50 ms
+_password_hasher = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+
+def new_id() -> str:
+    """A time-ordered UUIDv7 string for primary keys.
+
+    The leading 48-bit millisecond timestamp makes new keys sort after
+    existing ones, so inserts append to the right edge of the primary-key
+    index instead of landing on random pages. Existing v4 ids are unaffected.
+    """
+    unix_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), 'big')
+    value = (unix_ms & 0xFFFFFFFFFFFF) << 80 | 0x7 << 76 | (rand >> 62 & 0xFFF) << 64 | 0x2 << 62 | (rand & 0x3FFFFFFFFFFFFFFF)
+    return str(uuid.UUID(int=value))
+
 # Database Models
 class User(UserMixin, db.Model):
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(db.String(36), primary_key=True, default=new_id)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     name = db.Column(db.String(100), nullable=False)
@@ -69,13 +163,53 @@ class User(UserMixin, db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = _password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        if not self.password_hash.startswith('$argon2'):
+            # Legacy Werkzeug hash: verify, then upgrade to argon2 in place
+            if not check_password_hash(self.password_hash, password):
+                return False
+            self.set_password(password)
+            return True
+        try:
+            _password_hasher.verify(self.password_hash, password)
+        except (VerifyMismatchError, InvalidHashError):
+            return False
+        if _password_hasher.check_needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
+
+# Short-lived record of recent successful logins, so repeated logins skip the
+# deliberately slow hash. Keys include the stored hash (a password change
+# invalidates them) and hold the password only as an HMAC under a per-process
+# secret. Failed attempts are never cached.
+LOGIN_CACHE_TTL = 60
+LOGIN_CACHE_MAX_ENTRIES = 10000
+_login_cache = TTLCache(maxsize=LOGIN_CACHE_MAX_ENTRIES, ttl=LOGIN_CACHE_TTL)
+_login_cache_lock = threading.Lock()
+_login_cache_secret = secrets.token_bytes(32)
+
+def check_password_cached(user, password):
+    """User.check_password, short-circuited for recently verified credentials."""
+    digest = hmac.new(_login_cache_secret, password.encode('utf-8'), hashlib.sha256).digest()
+    with _login_cache_lock:
+        if (user.id, user.password_hash, digest) in _login_cache:
+            return True
+    if not user.check_password(password):
+        return False
+    with _login_cache_lock:
+        # Keyed on the hash after verification, which may have upgraded it
+        _login_cache[(user.id, user.password_hash, digest)] = True
+    return True
 
 class Transaction(db.Model):
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    __table_args__ = (
+        # Serves the per-user, newest-first listing in get_transactions
+        db.Index('ix_txn_user_date', 'user_id', 'date'),
+    )
+
+    id = db.Column(db.String(36), primary_key=True, default=new_id)
     user_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=False)
     amount = db.Column(db.Float, nullable=False)
     merchant = db.Column(db.String(255), nullable=False)
@@ -88,7 +222,7 @@ class Transaction(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class Category(db.Model):
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(db.String(36), primary_key=True, default=new_id)
     user_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
     color = db.Column(db.String(7), nullable=False)  # Hex color
@@ -97,7 +231,7 @@ class Category(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class UserPreferences(db.Model):
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(db.String(36), primary_key=True, default=new_id)
     user_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=False, unique=True)
     currency = db.Column(db.String(10), default='INR')
     theme = db.Column(db.String(20), default='light')
@@ -108,49 +242,57 @@ class UserPreferences(db.Model):
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(user_id)
+    # Flask-Login calls this at most once per request (current_user is cached
+    # on the request context); session.get then serves any later lookups of
+    # the same user from the identity map without another SELECT.
+    return db.session.get(User, user_id)
 
 # Helper functions
-def is_text_based(pdf_path: str) -> tuple[bool, str]:
-    """Check if PDF contains selectable text."""
-    text = extract_text(pdf_path)
-    return bool(text.strip()), text.strip()
-
-def ocr_pdf(pdf_path: str) -> str:
-    """Extract text from a scanned PDF using OCR."""
-    doc = fitz.open(pdf_path)
-    all_text = []
-    for page_num in range(len(doc)):
-        pix = doc[page_num].get_pixmap(dpi=300)
-        img = Image.open(io.BytesIO(pix.tobytes("png")))
-        text = pytesseract.image_to_string(img, lang="eng")
-        all_text.append(text)
-    return "\n".join(all_text)
+def _json_default(obj):
+    # Datetime-likes orjson doesn't handle itself, e.g. pandas Timestamps
+    # from spreadsheet uploads
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError
+
+def json_response(obj, status: int = 200):
+    """Build a JSON response with orjson (serializes dates natively)."""
+    return app.response_class(orjson.dumps(obj, default=_json_default), status=status, mimetype='application/json')
+
+def extract_pdf(pdf_bytes: bytes, page_text=None) -> tuple[str, str]:
+    """Extract text from a PDF, opening it once and OCRing only pages without text.
+
+    ``page_text`` extracts a page's selectable text (plain get_text by
+    default). Returns the combined text and the processing method used
+    ("text_extraction", "ocr" or "mixed").
+    """
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        page_texts, ocr_count = pdf_page_texts(doc, page_text)
+
+    if not ocr_count:
+        processing_method = "text_extraction"
+    elif ocr_count == len(page_texts):
+        processing_method = "ocr"
+    else:
+        processing_method = "mixed"
+    return "\n".join(page_texts), processing_method
 
 def parse_transactions(text: str) -> List[Dict[str, Any]]:
     """Extract date, merchant, type, and amount from PhonePe PDF text."""
     transactions = []
+    append = transactions.append
 
     # Match both "Paid to" (DEBIT) and "Received from" (CREDIT)
-    pattern = re.compile(
-        r'([A-Za-z]{3}\s+\d{1,2},\s+\d{4})\s+(?:Paid to|Received from)\s+([\s\S]*?)\s+(DEBIT|CREDIT)\s+₹([\d,]+(?:\.\d{1,2})?)',
-        re.MULTILINE
-    )
-
-    for match in pattern.findall(text):
-        date = match[0].strip()
-        merchant = re.sub(r'\s+', ' ', match[1]).strip()
-        txn_type = match[2].strip()
-        amount_str = match[3].replace(',', '')  # remove commas
+    for date_str, match in iter_phonepe_records(text):
         try:
-            amount = float(amount_str)
+            amount = float(match.group(3).replace(',', ''))  # remove commas
         except ValueError:
             continue  # skip invalid numbers
 
-        transactions.append({
-            "date": date,
-            "merchant": merchant,
-            "type": txn_type,
+        append({
+            "date": date_str.strip(),
+            "merchant": normalize_ws(match.group(1)),
+            "type": match.group(2).strip(),
             "amount": amount
         })
 
@@ -173,12 +315,13 @@ def register():
     )
     user.set_password(data['password'])
     
+    # Flush (not commit) to assign user.id; the user and its preferences are
+    # then saved together in a single transaction
     db.session.add(user)
-    db.session.commit()
+    db.session.flush()
     
     # Create default preferences
-    preferences = UserPreferences(user_id=user.id)
-    db.session.add(preferences)
+    db.session.add(UserPreferences(user_id=user.id))
     db.session.commit()
     
     login_user(user)
@@ -200,7 +343,10 @@ def login():
     
     user = User.query.filter_by(email=data['email']).first()
     
-    if user and user.check_password(data['password']):
+    if user and check_password_cached(user, data['password']):
+        # Persist a password hash upgraded during verification
+        if db.session.is_modified(user):
+            db.session.commit()
         login_user(user)
         return jsonify({
             'user': {
@@ -230,24 +376,79 @@ def get_profile():
     })
 
 # Transaction Routes
+MAX_TRANSACTIONS_PAGE_SIZE = 500
+
+def select_transactions(user_id: str):
+    """Core select of a user's transactions, labelled with the response keys.
+
+    Each row mapping is already the serialized transaction (no ORM instances
+    are built); dates are left as date/datetime objects for orjson.
+    """
+    return select(
+        Transaction.id.label('id'),
+        Transaction.user_id.label('userId'),
+        Transaction.amount.label('amount'),
+        Transaction.merchant.label('merchant'),
+        Transaction.category.label('category'),
+        Transaction.date.label('date'),
+        Transaction.payment_mode.label('paymentMode'),
+        Transaction.notes.label('notes'),
+        Transaction.source.label('source'),
+        Transaction.created_at.label('createdAt'),
+        Transaction.updated_at.label('updatedAt')
+    ).where(Transaction.user_id == user_id)
+
+@cache.memoize(timeout=30)
+def _list_transactions(user_id: str) -> List[Dict[str, Any]]:
+    """All transactions for a user, newest first (cached briefly)."""
+    stmt = select_transactions(user_id).order_by(Transaction.date.desc())
+    return [dict(row) for row in db.session.execute(stmt).mappings()]
+
+def page_transactions(user_id: str, limit: int, before: str = None) -> Dict[str, Any]:
+    """One page of transactions, newest first, keyset-paginated on (date, id).
+
+    ``before`` is the ``nextCursor`` of the previous page ("YYYY-MM-DD,<id>")
+    or a bare date; raises ValueError if it cannot be parsed.
+    """
+    stmt = select_transactions(user_id)
+    if before:
+        before_date, _, before_id = before.partition(',')
+        before_date = date.fromisoformat(before_date)
+        if before_id:
+            stmt = stmt.where(or_(
+                Transaction.date < before_date,
+                and_(Transaction.date == before_date, Transaction.id < before_id)
+            ))
+        else:
+            stmt = stmt.where(Transaction.date < before_date)
+    stmt = stmt.order_by(Transaction.date.desc(), Transaction.id.desc()).limit(limit)
+    
+    transactions = [dict(row) for row in db.session.execute(stmt).mappings()]
+    next_cursor = None
+    if len(transactions) == limit:
+        last = transactions[-1]
+        next_cursor = f"{last['date'].isoformat()},{last['id']}"
+    return {'transactions': transactions, 'nextCursor': next_cursor}
+
+def invalidate_transactions_cache(user_id: str):
+    """Drop the cached transaction list after a write."""
+    cache.delete_memoized(_list_transactions, user_id)
+
 @app.route('/api/transactions', methods=['GET'])
 @login_required
 def get_transactions():
-    transactions = Transaction.query.filter_by(user_id=current_user.id).order_by(Transaction.date.desc()).all()
-    
-    return jsonify([{
-        'id': t.id,
-        'userId': t.user_id,
-        'amount': t.amount,
-        'merchant': t.merchant,
-        'category': t.category,
-        'date': t.date.isoformat(),
-        'paymentMode': t.payment_mode,
-        'notes': t.notes,
-        'source': t.source,
-        'createdAt': t.created_at.isoformat(),
-        'updatedAt': t.updated_at.isoformat()
-    } for t in transactions])
+    # Without ?limit=, return the full list as before; with it, return a
+    # page plus a cursor to pass back as ?before= for the next page
+    limit = request.args.get('limit', type=int)
+    if limit is None:
+        return json_response(_list_transactions(current_user.id))
+    
+    limit = max(1, min(limit, MAX_TRANSACTIONS_PAGE_SIZE))
+    try:
+        page = page_transactions(current_user.id, limit, request.args.get('before'))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    return json_response(page)
 
 @app.route('/api/transactions', methods=['POST'])
 @login_required
@@ -259,7 +460,7 @@ def add_transaction():
         amount=data['amount'],
         merchant=data['merchant'],
         category=data['category'],
-        date=datetime.strptime(data['date'], '%Y-%m-%d').date(),
+        date=date.fromisoformat(data['date']),
         payment_mode=data['paymentMode'],
         notes=data.get('notes'),
         source=data['source']
@@ -267,6 +468,7 @@ def add_transaction():
     
     db.session.add(transaction)
     db.session.commit()
+    invalidate_transactions_cache(current_user.id)
     
     return jsonify({
         'id': transaction.id,
@@ -299,7 +501,7 @@ def update_transaction(transaction_id):
     if 'category' in data:
         transaction.category = data['category']
     if 'date' in data:
-        transaction.date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+        transaction.date = date.fromisoformat(data['date'])
     if 'paymentMode' in data:
         transaction.payment_mode = data['paymentMode']
     if 'notes' in data:
@@ -308,6 +510,7 @@ def update_transaction(transaction_id):
         transaction.source = data['source']
     
     db.session.commit()
+    invalidate_transactions_cache(current_user.id)
     
     return jsonify({
         'id': transaction.id,
@@ -333,6 +536,7 @@ def delete_transaction(transaction_id):
     
     db.session.delete(transaction)
     db.session.commit()
+    invalidate_transactions_cache(current_user.id)
     
     return jsonify({'message': 'Transaction deleted successfully'})
 
@@ -342,44 +546,53 @@ def bulk_add_transactions():
     data = request.get_json()
     transactions_data = data.get('transactions', [])
     
-    transactions = []
-    for t_data in transactions_data:
-        transaction = Transaction(
-            user_id=current_user.id,
-            amount=t_data['amount'],
-            merchant=t_data['merchant'],
-            category=t_data['category'],
-            date=datetime.strptime(t_data['date'], '%Y-%m-%d').date(),
-            payment_mode=t_data['paymentMode'],
-            notes=t_data.get('notes'),
-            source=t_data['source']
-        )
-        transactions.append(transaction)
-    
-    db.session.add_all(transactions)
+    # Build plain row mappings (ids and timestamps assigned up front) so the
+    # insert bypasses the ORM unit-of-work and runs as one executemany
+    now = datetime.utcnow()
+    mappings = [{
+        'id': new_id(),
+        'user_id': current_user.id,
+        'amount': float(t_data['amount']),
+        'merchant': t_data['merchant'],
+        'category': t_data['category'],
+        'date': date.fromisoformat(t_data['date']),
+        'payment_mode': t_data['paymentMode'],
+        'notes': t_data.get('notes'),
+        'source': t_data['source'],
+        'created_at': now,
+        'updated_at': now
+    } for t_data in transactions_data]
+    
+    db.session.bulk_insert_mappings(Transaction, mappings)
     db.session.commit()
-    
-    return jsonify([{
-        'id': t.id,
-        'userId': t.user_id,
-        'amount': t.amount,
-        'merchant': t.merchant,
-        'category': t.category,
-        'date': t.date.isoformat(),
-        'paymentMode': t.payment_mode,
-        'notes': t.notes,
-        'source': t.source,
-        'createdAt': t.created_at.isoformat(),
-        'updatedAt': t.updated_at.isoformat()
-    } for t in transactions]), 201
+    invalidate_transactions_cache(current_user.id)
+    
+    return json_response([{
+        'id': t['id'],
+        'userId': t['user_id'],
+        'amount': t['amount'],
+        'merchant': t['merchant'],
+        'category': t['category'],
+        'date': t['date'],
+        'paymentMode': t['payment_mode'],
+        'notes': t['notes'],
+        'source': t['source'],
+        'createdAt': t['created_at'],
+        'updatedAt': t['updated_at']
+    } for t in mappings], 201)
 
 # Category Routes
 @app.route('/api/categories', methods=['GET'])
 @login_required
 def get_categories():
-    categories = Category.query.filter_by(user_id=current_user.id).all()
-    
-    return jsonify([{
+    # Load only the serialized columns; raiseload turns any accidental lazy
+    # load (e.g. a relationship added later) into an error instead of N+1
+    categories = Category.query.options(
+        load_only(Category.id, Category.name, Category.color, Category.icon),
+        raiseload('*')
+    ).filter_by(user_id=current_user.id).all()
+    
+    return json_response([{
         'id': c.id,
         'name': c.name,
         'color': c.color,
@@ -448,16 +661,28 @@ def delete_category(category_id):
     return jsonify({'message': 'Category deleted successfully'})
 
 # User Preferences Routes
-@app.route('/api/user-preferences', methods=['GET'])
-@login_required
-def get_user_preferences():
-    preferences = UserPreferences.query.filter_by(user_id=current_user.id).first()
-    
-    if not preferences:
-        preferences = UserPreferences(user_id=current_user.id)
-        db.session.add(preferences)
-        db.session.commit()
-    
+# Request field -> UserPreferences column
+PREFERENCE_FIELDS = {
+    'currency': 'currency',
+    'theme': 'theme',
+    'notificationsEnabled': 'notifications_enabled',
+    'autoCategorize': 'auto_categorize'
+}
+
+def upsert_insert(model):
+    """INSERT for the active dialect, supporting ON CONFLICT (PostgreSQL/SQLite)."""
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql_insert(model)
+    return sqlite_insert(model)
+
+def load_preferences(user_id: str):
+    """A user's preferences row, loading only the columns in the response."""
+    return UserPreferences.query.options(
+        load_only(*(getattr(UserPreferences, column) for column in PREFERENCE_FIELDS.values())),
+        raiseload('*')
+    ).filter_by(user_id=user_id).first()
+
+def preferences_response(preferences):
     return jsonify({
         'currency': preferences.currency,
         'theme': preferences.theme,
@@ -465,34 +690,129 @@ def get_user_preferences():
         'autoCategorize': preferences.auto_categorize
     })
 
-@app.route('/api/user-preferences', methods=['PUT'])
+@app.route('/api/user-preferences', methods=['GET'])
 @login_required
-def update_user_preferences():
-    preferences = UserPreferences.query.filter_by(user_id=current_user.id).first()
+def get_user_preferences():
+    preferences = load_preferences(current_user.id)
     
     if not preferences:
-        preferences = UserPreferences(user_id=current_user.id)
-        db.session.add(preferences)
+        # Create defaults without racing a concurrent request doing the same
+        db.session.execute(
+            upsert_insert(UserPreferences)
+            .values(user_id=current_user.id)
+            .on_conflict_do_nothing(index_elements=['user_id'])
+        )
+        db.session.commit()
+        preferences = load_preferences(current_user.id)
     
+    return preferences_response(preferences)
+
+@app.route('/api/user-preferences', methods=['PUT'])
+@login_required
+def update_user_preferences():
     data = request.get_json()
     
-    if 'currency' in data:
-        preferences.currency = data['currency']
-    if 'theme' in data:
-        preferences.theme = data['theme']
-    if 'notificationsEnabled' in data:
-        preferences.notifications_enabled = data['notificationsEnabled']
-    if 'autoCategorize' in data:
-        preferences.auto_categorize = data['autoCategorize']
+    updates = {column: data[field] for field, column in PREFERENCE_FIELDS.items() if field in data}
     
+    # Insert-or-update in a single statement
+    stmt = upsert_insert(UserPreferences).values(user_id=current_user.id, **updates)
+    if updates:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id'],
+            set_={**updates, 'updated_at': datetime.utcnow()}
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=['user_id'])
+    db.session.execute(stmt)
     db.session.commit()
     
-    return jsonify({
-        'currency': preferences.currency,
-        'theme': preferences.theme,
-        'notificationsEnabled': preferences.notifications_enabled,
-        'autoCategorize': preferences.auto_categorize
-    })
+    preferences = load_preferences(current_user.id)
+    return preferences_response(preferences)
+
+# File Processing Jobs
+def process_phonepe_job(pdf_bytes: bytes) -> Dict[str, Any]:
+    """Extract PhonePe transactions from uploaded PDF bytes."""
+    # Extract selectable text, falling back to OCR for scanned pages
+    text_data, processing_method = extract_pdf(pdf_bytes)
+
+    logger.debug("Extracted %d characters (%s)", len(text_data), processing_method)
+
+    # Parse transactions
+    transactions = parse_transactions(text_data)
+
+    return {
+        "success": True,
+        "transactions": transactions,
+        "total_transactions": len(transactions),
+        "processing_method": processing_method,
+        "raw_text": text_data[:1000] + "..." if len(text_data) > 1000 else text_data
+    }
+
+def process_paytm_job(pdf_bytes: bytes) -> Dict[str, Any]:
+    """Extract Paytm transactions from uploaded PDF bytes."""
+    # Extract selectable text row by row, as the standalone Paytm processor
+    # does, falling back to OCR for scanned pages
+    text_data, processing_method = extract_pdf(pdf_bytes, page_text_rows)
+
+    logger.debug("Extracted %d characters (%s)", len(text_data), processing_method)
+
+    # Parse transactions using Paytm parser
+    transactions = parse_paytm_transactions(text_data)
+
+    return {
+        "success": True,
+        "transactions": transactions,
+        "total_transactions": len(transactions),
+        "processing_method": processing_method,
+        "service": "Paytm",
+        "raw_text": text_data[:1500] + "..." if len(text_data) > 1500 else text_data
+    }
+
+# Parsed statement results are cached by upload content, so re-uploading the
+# same statement skips OCR and parsing entirely. Only the PhonePe/Paytm jobs
+# are cached: their results are a transaction list plus a capped text
+# preview, whereas /upload-file returns the full extracted text or every
+# spreadsheet row of an upload of up to MAX_CONTENT_LENGTH. Results are keyed
+# by content and never go stale, so without Redis a per-worker LRU is safe.
+UPLOAD_RESULT_CACHE_TIMEOUT = 3600
+UPLOAD_RESULT_CACHE_MAX_ENTRIES = 128
+CACHED_UPLOAD_JOBS = (process_phonepe_job, process_paytm_job)
+upload_results = cache if os.environ.get('REDIS_URL') else ContentCache(UPLOAD_RESULT_CACHE_MAX_ENTRIES)
+
+def upload_cache_key(job_func, file_bytes: bytes) -> str:
+    return content_key(f"upload:{job_func.__name__}", file_bytes)
+
+def run_and_cache_upload(job_func, file_bytes: bytes, cache_key: str):
+    """Run an upload job and cache its result under ``cache_key``."""
+    result = job_func(file_bytes)
+    upload_results.set(cache_key, result, timeout=UPLOAD_RESULT_CACHE_TIMEOUT)
+    return result
+
+def upload_job_owner() -> str:
+    """Identify who may read an upload job: the logged-in user, else this session."""
+    if current_user.is_authenticated:
+        return f"user:{current_user.id}"
+    if 'upload_owner' not in session:
+        session['upload_owner'] = secrets.token_urlsafe(16)
+    return f"session:{session['upload_owner']}"
+
+def run_upload_job(job_func, file_bytes: bytes):
+    """Enqueue an upload job when a worker queue is configured, else run it inline."""
+    if job_func not in CACHED_UPLOAD_JOBS:
+        if task_queue is not None:
+            job = task_queue.enqueue(job_func, file_bytes, meta={'owner': upload_job_owner()})
+            return jsonify({"success": True, "job_id": job.id, "status": job.get_status()}), 202
+        return json_response(job_func(file_bytes))
+
+    cache_key = upload_cache_key(job_func, file_bytes)
+    cached = upload_results.get(cache_key)
+    if cached is not None:
+        return json_response(cached)
+    if task_queue is not None:
+        job = task_queue.enqueue(run_and_cache_upload, job_func, file_bytes, cache_key,
+                                 meta={'owner': upload_job_owner()})
+        return jsonify({"success": True, "job_id": job.id, "status": job.get_status()}), 202
+    return json_response(run_and_cache_upload(job_func, file_bytes, cache_key))
 
 # File Processing Routes (existing code)
 @app.route('/process-phonepe-pdf', methods=['POST'])
@@ -510,43 +830,10 @@ def process_phonepe_pdf():
         return jsonify({"error": "File must be a PDF"}), 400
 
     try:
-        # Save uploaded file temporarily
-        temp_path = f"temp_{file.filename}"
-        file.save(temp_path)
-
-        # Check if PDF is text-based or scanned
-        has_text, extracted_text = is_text_based(temp_path)
-
-        if has_text:
-            text_data = extracted_text
-            processing_method = "text_extraction"
-        else:
-            text_data = ocr_pdf(temp_path)
-            processing_method = "ocr"
-
-        # Debug first 500 chars
-        print("\n===== DEBUG: FIRST 500 CHARS OF EXTRACTED TEXT =====")
-        print(text_data[:500])
-        print("====================================================\n")
-
-        # Parse transactions
-        transactions = parse_transactions(text_data)
-
-        # Clean up temp file
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-
-        return jsonify({
-            "success": True,
-            "transactions": transactions,
-            "total_transactions": len(transactions),
-            "processing_method": processing_method,
-            "raw_text": text_data[:1000] + "..." if len(text_data) > 1000 else text_data
-        })
+        # Process the upload in memory (no temp file round-trip)
+        return run_upload_job(process_phonepe_job, file.read())
 
     except Exception as e:
-        if 'temp_path' in locals() and os.path.exists(temp_path):
-            os.remove(temp_path)
         return jsonify({"error": f"Processing failed: {str(e)}"}), 500
 
 @app.route('/process-paytm-pdf', methods=['POST'])
@@ -564,47 +851,31 @@ def process_paytm_pdf():
         return jsonify({"error": "File must be a PDF"}), 400
 
     try:
-        # Save uploaded file temporarily
-        temp_path = f"temp_paytm_{file.filename}"
-        file.save(temp_path)
+        # Process the upload in memory (no temp file round-trip)
+        return run_upload_job(process_paytm_job, file.read())
 
-        # Use Paytm-specific functions
-        has_text, extracted_text = paytm_is_text_based(temp_path)
-
-        if has_text:
-            text_data = extracted_text
-            processing_method = "text_extraction"
-        else:
-            text_data = paytm_ocr_pdf(temp_path)
-            processing_method = "ocr"
-
-        # Debug output
-        print("\n===== DEBUG: PAYTM PDF TEXT EXTRACTION =====")
-        print(f"Text length: {len(text_data)} characters")
-        print("First 1000 chars:")
-        print(text_data[:1000])
-        print("============================================\n")
+    except Exception as e:
+        return jsonify({"error": f"Paytm processing failed: {str(e)}"}), 500
 
-        # Parse transactions using Paytm parser
-        transactions = parse_paytm_transactions(text_data)
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Get the status (and result, once finished) of a queued upload job."""
+    if task_queue is None:
+        return jsonify({"error": "Background processing is not enabled"}), 404
 
-        # Clean up temp file
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+    job = task_queue.fetch_job(job_id)
+    # Results hold parsed transactions, so only the uploader may read them
+    if job is None or job.meta.get('owner') != upload_job_owner():
+        return jsonify({"error": "Job not found"}), 404
 
-        return jsonify({
-            "success": True,
-            "transactions": transactions,
-            "total_transactions": len(transactions),
-            "processing_method": processing_method,
-            "service": "Paytm",
-            "raw_text": text_data[:1500] + "..." if len(text_data) > 1500 else text_data
-        })
+    response = {"job_id": job.id, "status": job.get_status()}
+    if job.is_finished:
+        response["result"] = job.result
+    elif job.is_failed:
+        response["error"] = "Processing failed"
+    return json_response(response)
 
-    except Exception as e:
-        if 'temp_path' in locals() and os.path.exists(temp_path):
-            os.remove(temp_path)
-        return jsonify({"error": f"Paytm processing failed: {str(e)}"}), 500
+SUPPORTED_UPLOAD_EXTENSIONS = ('.pdf', '.xlsx', '.xls', '.xlsm', '.csv')
 
 @app.route('/upload-file', methods=['POST'])
 def upload_file():
@@ -621,34 +892,22 @@ def upload_file():
     file_ext = os.path.splitext(file.filename)[1].lower()
     
     # Check supported file types
-    supported_extensions = ['.pdf', '.xlsx', '.xls', '.xlsm', '.csv']
-    if file_ext not in supported_extensions:
+    if file_ext not in SUPPORTED_UPLOAD_EXTENSIONS:
         return jsonify({
-            "error": f"Unsupported file type: {file_ext}. Supported types: {', '.join(supported_extensions)}"
+            "error": f"Unsupported file type: {file_ext}. Supported types: {', '.join(SUPPORTED_UPLOAD_EXTENSIONS)}"
         }), 400
 
     try:
-        # Save uploaded file temporarily
-        temp_path = f"temp_upload_{file.filename}"
-        file.save(temp_path)
-
-        # Process file based on type using imported functions
+        # Process the upload in memory (no temp file round-trip), on the
+        # worker queue when one is configured
         if file_ext == '.pdf':
-            result = extract_pdf_data(temp_path)
-        else:  # Excel/CSV files
-            result = extract_excel_data(temp_path)
-
-        # Clean up temp file
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-
-        return jsonify(result)
+            return run_upload_job(extract_pdf_data, file.read())
+        if file_ext == '.csv':
+            return run_upload_job(extract_csv_data, file.read())
+        # Excel files
+        return run_upload_job(extract_excel_data, file.read())
 
     except Exception as e:
-        # Clean up temp file on error
-        if 'temp_path' in locals() and os.path.exists(temp_path):
-            os.remove(temp_path)
-        
         return jsonify({
             "success": False,
             "error": f"File processing failed: {str(e)}",
@@ -738,6 +997,7 @@ if __name__ == '__main__':
     print("   - POST /process-phonepe-pdf - Process PhonePe PDF files")
     print("   - POST /process-paytm-pdf - Process Paytm PDF files")
     print("   - POST /upload-file - Upload and process files")
+    print("   - GET  /jobs/<id> - Get queued upload job status")
     print("   - GET  /health - Health check")
     print("📋 Supported file formats:")
     print("   - PDF files (.pdf) - Text extraction + OCR")
@@ -746,4 +1006,5 @@ if __name__ == '__main__':
     print(f"🌐 Server will be available at: http://localhost:{port}")
     print(f"🔗 Frontend should connect to: http://localhost:{port}")
     print(f"🐛 Debug mode: {debug}")
+    # Development server only; production runs under gunicorn (gunicorn.conf.py)
     app.run(host='0.0.0.0', port=port, debug=debug)
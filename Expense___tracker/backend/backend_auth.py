@@ -1,33 +1,61 @@
 from flask import Flask, request, jsonify, session
 from flask_cors import CORS
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
+from flask_caching import Cache
 import sqlite3
 import hashlib
+import hmac
 import secrets
 import os
 from datetime import datetime, timedelta
 import json
+import orjson
+from cachetools import TTLCache
 from typing import List, Dict, Any
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError, InvalidHashError
 import fitz  # PyMuPDF
-import pytesseract
-from pdfminer.high_level import extract_text
-from PIL import Image
-import io
-import re
 import time
+import threading
 import traceback
 
 # Import existing processors
-from backend.paytmapp import parse_paytm_transactions, is_text_based as paytm_is_text_based, ocr_pdf as paytm_ocr_pdf
-from file_upload_processor import extract_pdf_data, extract_excel_data
+from paytmapp import parse_paytm_transactions, extract_pdf_text as paytm_extract_pdf_text
+from regex_cache import iter_phonepe_records, normalize_ws
+from ocr_engine import pdf_page_texts
+from sqlite_pool import ConnectionPool, connect
+from upload_request import InMemoryUploadRequest
 
 app = Flask(__name__)
-app.config['SECRET_KEY'] = secrets.token_hex(16)
+app.request_class = InMemoryUploadRequest
+# Set SECRET_KEY when running several worker processes: a per-process random
+# key would make each worker reject the others' session cookies
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or secrets.token_hex(16)
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=7)
+# Uploads are processed in memory; reject anything larger than a statement
+# could reasonably be (Werkzeug answers 413)
+app.config['MAX_CONTENT_LENGTH'] = 32 * 1024 * 1024
 
 # Enable CORS with credentials support
 CORS(app, supports_credentials=True, origins=['http://localhost:3000', 'http://localhost:5173'])
 
+# Background queue for PDF processing (RQ). Opt-in with PDF_QUEUE_ENABLED=1
+# (plus REDIS_URL and a running `rq worker`), since queued uploads answer 202
+# with a job id to poll; otherwise PDFs are processed inside the request.
+task_queue = None
+if os.environ.get('PDF_QUEUE_ENABLED', '').lower() in ('1', 'true') and os.environ.get('REDIS_URL'):
+    from redis import Redis
+    from rq import Queue
+    task_queue = Queue(connection=Redis.from_url(os.environ['REDIS_URL']))
+
+# Short-lived cache for per-user listings, only with Redis (shared by all
+# worker processes, so invalidation reaches every one). An in-process cache
+# would leave other workers serving stale listings after a write.
+if os.environ.get('REDIS_URL'):
+    cache = Cache(app, config={'CACHE_TYPE': 'RedisCache', 'CACHE_REDIS_URL': os.environ['REDIS_URL']})
+else:
+    cache = Cache(app, config={'CACHE_TYPE': 'NullCache'})
+
 # Initialize Flask-Login
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -35,6 +63,8 @@ login_manager.login_view = 'login'
 
 # Database setup
 DATABASE = 'expense_tracker.db'
+# sqlite3.Row still supports positional access, so rows can be read by name
+pool = ConnectionPool(DATABASE, row_factory=sqlite3.Row)
 
 class User(UserMixin):
     def __init__(self, id, email, display_name, created_at):
@@ -43,21 +73,45 @@ class User(UserMixin):
         self.display_name = display_name
         self.created_at = created_at
 
+# user_id -> users row; load_user runs on every authenticated request, so
+# recently seen users are served from memory for a short while
+USER_CACHE_TTL = 60
+USER_CACHE_MAX_ENTRIES = 4096
+_user_cache = TTLCache(maxsize=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL)
+_user_cache_lock = threading.Lock()
+
+def _cached_user_row(user_id):
+    with _user_cache_lock:
+        user_data = _user_cache.get(user_id)
+    if user_data is not None:
+        return user_data
+    
+    with pool.get_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT id, email, display_name, created_at FROM users WHERE id = ?', (user_id,))
+        user_data = cursor.fetchone()
+    
+    if user_data:
+        with _user_cache_lock:
+            _user_cache[user_id] = user_data
+    return user_data
+
+def invalidate_user_cache(user_id):
+    """Drop a cached user row (on logout or when the user changes)."""
+    with _user_cache_lock:
+        _user_cache.pop(str(user_id), None)
+
 @login_manager.user_loader
 def load_user(user_id):
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
-    user_data = cursor.fetchone()
-    conn.close()
+    user_data = _cached_user_row(user_id)
     
     if user_data:
-        return User(user_data[0], user_data[1], user_data[3], user_data[4])
+        return User(user_data['id'], user_data['email'], user_data['display_name'], user_data['created_at'])
     return None
 
 def init_database():
     """Initialize the SQLite database with required tables."""
-    conn = sqlite3.connect(DATABASE)
+    conn = connect(DATABASE)
     cursor = conn.cursor()
     
     # Users table
@@ -112,21 +166,43 @@ def init_database():
         )
     ''')
     
+    # Serves the per-user, newest-first listing in get_transactions (the
+    # UNIQUE constraint on users.email already indexes login lookups)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tx_user_date
+        ON transactions (user_id, date DESC, created_at DESC)
+    ''')
+    
     conn.commit()
     conn.close()
 
+# Password hashing: argon2id (salt and parameters are embedded in the hash)
+_password_hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=1)
+
 def hash_password(password: str) -> str:
-    """Hash a password with salt."""
-    salt = secrets.token_hex(16)
-    password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-    return salt + password_hash.hex()
+    """Hash a password with argon2id."""
+    return _password_hasher.hash(password)
 
-def verify_password(password: str, hashed: str) -> bool:
-    """Verify a password against its hash."""
+def _verify_legacy_password(password: str, hashed: str) -> bool:
+    """Verify a password against a legacy salted PBKDF2-SHA256 hash."""
     salt = hashed[:32]
     stored_hash = hashed[32:]
     password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-    return password_hash.hex() == stored_hash
+    # Constant-time comparison, so response timing doesn't leak the hash
+    return hmac.compare_digest(password_hash.hex(), stored_hash)
+
+def verify_password(password: str, hashed: str) -> bool:
+    """Verify a password against its hash."""
+    if not hashed.startswith('$argon2'):
+        return _verify_legacy_password(password, hashed)
+    try:
+        return _password_hasher.verify(hashed, password)
+    except (VerifyMismatchError, InvalidHashError):
+        return False
+
+def password_needs_rehash(hashed: str) -> bool:
+    """Whether a verified hash should be replaced (legacy or outdated parameters)."""
+    return not hashed.startswith('$argon2') or _password_hasher.check_needs_rehash(hashed)
 
 # Authentication Routes
 @app.route('/api/auth/register', methods=['POST'])
@@ -144,64 +220,59 @@ def register():
     if len(password) < 6:
         return jsonify({'error': 'Password must be at least 6 characters long'}), 400
     
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
-    try:
-        # Check if user already exists
-        cursor.execute('SELECT id FROM users WHERE email = ?', (email,))
-        if cursor.fetchone():
-            return jsonify({'error': 'User already exists with this email'}), 400
+    with pool.get_conn() as conn:
+        cursor = conn.cursor()
         
-        # Create new user
-        password_hash = hash_password(password)
-        cursor.execute('''
-            INSERT INTO users (email, password_hash, display_name)
-            VALUES (?, ?, ?)
-        ''', (email, password_hash, display_name))
+        try:
+            # Create new user; the UNIQUE constraint on email rejects duplicates
+            password_hash = hash_password(password)
+            try:
+                cursor.execute('''
+                    INSERT INTO users (email, password_hash, display_name)
+                    VALUES (?, ?, ?)
+                ''', (email, password_hash, display_name))
+            except sqlite3.IntegrityError:
+                return jsonify({'error': 'User already exists with this email'}), 400
         
-        user_id = cursor.lastrowid
-        conn.commit()
+            # Commit once below, together with the default categories
+            user_id = cursor.lastrowid
         
-        # Create default categories for new user
-        default_categories = [
-            ('Food & Dining', '#EF4444'),
-            ('Transportation', '#F59E0B'),
-            ('Shopping', '#8B5CF6'),
-            ('Entertainment', '#EC4899'),
-            ('Bills & Utilities', '#10B981'),
-            ('Healthcare', '#06B6D4'),
-            ('Other', '#6B7280')
-        ]
+            # Create default categories for new user
+            default_categories = [
+                ('Food & Dining', '#EF4444'),
+                ('Transportation', '#F59E0B'),
+                ('Shopping', '#8B5CF6'),
+                ('Entertainment', '#EC4899'),
+                ('Bills & Utilities', '#10B981'),
+                ('Healthcare', '#06B6D4'),
+                ('Other', '#6B7280')
+            ]
         
-        for category_name, color in default_categories:
-            cursor.execute('''
+            cursor.executemany('''
                 INSERT INTO categories (user_id, name, color)
                 VALUES (?, ?, ?)
-            ''', (user_id, category_name, color))
+            ''', [(user_id, category_name, color) for category_name, color in default_categories])
         
-        conn.commit()
+            conn.commit()
         
-        # Log in the user
-        user = User(user_id, email, display_name, datetime.now())
-        login_user(user, remember=True)
-        session.permanent = True
+            # Log in the user
+            user = User(user_id, email, display_name, datetime.now())
+            login_user(user, remember=True)
+            session.permanent = True
         
-        return jsonify({
-            'success': True,
-            'user': {
-                'id': user_id,
-                'email': email,
-                'displayName': display_name,
-                'createdAt': datetime.now().isoformat()
-            }
-        })
+            return jsonify({
+                'success': True,
+                'user': {
+                    'id': user_id,
+                    'email': email,
+                    'displayName': display_name,
+                    'createdAt': datetime.now().isoformat()
+                }
+            })
         
-    except Exception as e:
-        conn.rollback()
-        return jsonify({'error': f'Registration failed: {str(e)}'}), 500
-    finally:
-        conn.close()
+        except Exception as e:
+            conn.rollback()
+            return jsonify({'error': f'Registration failed: {str(e)}'}), 500
 
 @app.route('/api/auth/login', methods=['POST'])
 def login():
@@ -214,26 +285,35 @@ def login():
     email = data['email'].lower().strip()
     password = data['password']
     
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE email = ?', (email,))
-    user_data = cursor.fetchone()
-    conn.close()
+    with pool.get_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT id, email, display_name, created_at, password_hash FROM users WHERE email = ?',
+            (email,)
+        )
+        user_data = cursor.fetchone()
     
-    if not user_data or not verify_password(password, user_data[2]):
+    if not user_data or not verify_password(password, user_data['password_hash']):
         return jsonify({'error': 'Invalid email or password'}), 401
     
-    user = User(user_data[0], user_data[1], user_data[3], user_data[4])
+    # Upgrade legacy PBKDF2 hashes to argon2id now that we have the password
+    if password_needs_rehash(user_data['password_hash']):
+        with pool.get_conn() as conn:
+            conn.execute('UPDATE users SET password_hash = ? WHERE id = ?',
+                         (hash_password(password), user_data['id']))
+            conn.commit()
+    
+    user = User(user_data['id'], user_data['email'], user_data['display_name'], user_data['created_at'])
     login_user(user, remember=True)
     session.permanent = True
     
     return jsonify({
         'success': True,
         'user': {
-            'id': user_data[0],
-            'email': user_data[1],
-            'displayName': user_data[3],
-            'createdAt': user_data[4]
+            'id': user_data['id'],
+            'email': user_data['email'],
+            'displayName': user_data['display_name'],
+            'createdAt': user_data['created_at']
         }
     })
 
@@ -241,6 +321,7 @@ def login():
 @login_required
 def logout():
     """Logout user."""
+    invalidate_user_cache(current_user.id)
     logout_user()
     session.clear()
     return jsonify({'success': True})
@@ -259,35 +340,36 @@ def get_current_user():
         }
     })
 
+def json_response(obj, status: int = 200):
+    """Build a JSON response with orjson."""
+    return app.response_class(orjson.dumps(obj), status=status, mimetype='application/json')
+
 # Transaction Management Routes
+@cache.memoize(timeout=30)
+def _list_transactions(user_id) -> List[Dict[str, Any]]:
+    """All transactions for a user, newest first (cached briefly)."""
+    with pool.get_conn() as conn:
+        cursor = conn.cursor()
+        # Columns are aliased to the response keys, so each sqlite3.Row
+        # converts straight to the output dict
+        cursor.execute('''
+            SELECT id, date, merchant, type, amount, category, platform,
+                   created_at AS createdAt
+            FROM transactions 
+            WHERE user_id = ? 
+            ORDER BY date DESC, created_at DESC
+        ''', (user_id,))
+        return [dict(row) for row in cursor]
+
+def invalidate_transactions_cache(user_id):
+    """Drop the cached transaction list after a write."""
+    cache.delete_memoized(_list_transactions, user_id)
+
 @app.route('/api/transactions', methods=['GET'])
 @login_required
 def get_transactions():
     """Get user's transactions."""
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT id, date, merchant, type, amount, category, platform, created_at
-        FROM transactions 
-        WHERE user_id = ? 
-        ORDER BY date DESC, created_at DESC
-    ''', (current_user.id,))
-    
-    transactions = []
-    for row in cursor.fetchall():
-        transactions.append({
-            'id': row[0],
-            'date': row[1],
-            'merchant': row[2],
-            'type': row[3],
-            'amount': row[4],
-            'category': row[5],
-            'platform': row[6],
-            'createdAt': row[7]
-        })
-    
-    conn.close()
-    return jsonify({'success': True, 'transactions': transactions})
+    return json_response({'success': True, 'transactions': _list_transactions(current_user.id)})
 
 @app.route('/api/transactions', methods=['POST'])
 @login_required
@@ -298,16 +380,11 @@ def add_transactions():
     if not data or not data.get('transactions'):
         return jsonify({'error': 'Transactions data is required'}), 400
     
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
-    try:
-        added_count = 0
-        for transaction in data['transactions']:
-            cursor.execute('''
-                INSERT INTO transactions (user_id, date, merchant, type, amount, category, platform)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
+    with pool.get_conn() as conn:
+        cursor = conn.cursor()
+        
+        try:
+            rows = [(
                 current_user.id,
                 transaction.get('date'),
                 transaction.get('merchant'),
@@ -315,42 +392,45 @@ def add_transactions():
                 transaction.get('amount'),
                 transaction.get('category', 'Other'),
                 transaction.get('platform', 'Unknown')
-            ))
-            added_count += 1
+            ) for transaction in data['transactions']]
+            
+            # One prepared statement for every row, in a single transaction
+            cursor.executemany('''
+                INSERT INTO transactions (user_id, date, merchant, type, amount, category, platform)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
         
-        conn.commit()
-        return jsonify({'success': True, 'added': added_count})
+            conn.commit()
+            invalidate_transactions_cache(current_user.id)
+            return jsonify({'success': True, 'added': len(rows)})
         
-    except Exception as e:
-        conn.rollback()
-        return jsonify({'error': f'Failed to add transactions: {str(e)}'}), 500
-    finally:
-        conn.close()
+        except Exception as e:
+            conn.rollback()
+            return jsonify({'error': f'Failed to add transactions: {str(e)}'}), 500
 
 @app.route('/api/transactions/<int:transaction_id>', methods=['DELETE'])
 @login_required
 def delete_transaction(transaction_id):
     """Delete a transaction."""
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute('''
-            DELETE FROM transactions 
-            WHERE id = ? AND user_id = ?
-        ''', (transaction_id, current_user.id))
+    with pool.get_conn() as conn:
+        cursor = conn.cursor()
         
-        if cursor.rowcount == 0:
-            return jsonify({'error': 'Transaction not found'}), 404
+        try:
+            cursor.execute('''
+                DELETE FROM transactions 
+                WHERE id = ? AND user_id = ?
+            ''', (transaction_id, current_user.id))
         
-        conn.commit()
-        return jsonify({'success': True})
+            if cursor.rowcount == 0:
+                return jsonify({'error': 'Transaction not found'}), 404
         
-    except Exception as e:
-        conn.rollback()
-        return jsonify({'error': f'Failed to delete transaction: {str(e)}'}), 500
-    finally:
-        conn.close()
+            conn.commit()
+            invalidate_transactions_cache(current_user.id)
+            return jsonify({'success': True})
+        
+        except Exception as e:
+            conn.rollback()
+            return jsonify({'error': f'Failed to delete transaction: {str(e)}'}), 500
 
 # PDF Processing Routes (with authentication)
 @app.route('/api/process-phonepe-pdf', methods=['POST'])
@@ -369,86 +449,82 @@ def process_phonepe_pdf():
         return jsonify({"error": "File must be a PDF"}), 400
 
     try:
-        # Save uploaded file temporarily
-        temp_path = f"temp_{current_user.id}_{file.filename}"
-        file.save(temp_path)
-
-        # Check if PDF is text-based or scanned
-        has_text, extracted_text = is_text_based(temp_path)
-
-        if has_text:
-            text_data = extracted_text
-            processing_method = "text_extraction"
-        else:
-            text_data = ocr_pdf(temp_path)
-            processing_method = "ocr"
-
-        # Parse transactions
-        transactions = parse_phonepe_transactions(text_data)
-
-        # Clean up temp file
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-
-        return jsonify({
-            "success": True,
-            "transactions": transactions,
-            "total_transactions": len(transactions),
-            "processing_method": processing_method,
-            "platform": "PhonePe"
-        })
+        # Process the upload in memory (no temp file round-trip)
+        return run_upload_job(process_phonepe_job, file.read())
 
     except Exception as e:
-        if 'temp_path' in locals() and os.path.exists(temp_path):
-            os.remove(temp_path)
         return jsonify({"error": f"Processing failed: {str(e)}"}), 500
 
-def is_text_based(pdf_path: str) -> tuple[bool, str]:
-    """Check if PDF contains selectable text."""
-    text = extract_text(pdf_path)
-    return bool(text.strip()), text.strip()
-
-def ocr_pdf(pdf_path: str) -> str:
-    """Extract text from a scanned PDF using OCR."""
-    doc = fitz.open(pdf_path)
-    all_text = []
-    for page_num in range(len(doc)):
-        pix = doc[page_num].get_pixmap(dpi=300)
-        img = Image.open(io.BytesIO(pix.tobytes("png")))
-        text = pytesseract.image_to_string(img, lang="eng")
-        all_text.append(text)
-    return "\n".join(all_text)
+def extract_pdf_text(pdf_bytes: bytes) -> tuple[bool, str]:
+    """Extract PDF text, OCRing only the pages without selectable text."""
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        page_texts, ocr_count = pdf_page_texts(doc)
+    return ocr_count < len(page_texts), "\n".join(page_texts).strip()
 
 def parse_phonepe_transactions(text: str) -> List[Dict[str, Any]]:
     """Extract date, merchant, type, and amount from PhonePe PDF text."""
     transactions = []
+    append = transactions.append
 
     # Match both "Paid to" (DEBIT) and "Received from" (CREDIT)
-    pattern = re.compile(
-        r'([A-Za-z]{3}\s+\d{1,2},\s+\d{4})\s+(?:Paid to|Received from)\s+([\s\S]*?)\s+(DEBIT|CREDIT)\s+₹([\d,]+(?:\.\d{1,2})?)',
-        re.MULTILINE
-    )
-
-    for match in pattern.findall(text):
-        date = match[0].strip()
-        merchant = re.sub(r'\s+', ' ', match[1]).strip()
-        txn_type = match[2].strip()
-        amount_str = match[3].replace(',', '')  # remove commas
+    for date, match in iter_phonepe_records(text):
         try:
-            amount = float(amount_str)
+            amount = float(match.group(3).replace(',', ''))  # remove commas
         except ValueError:
             continue  # skip invalid numbers
 
-        transactions.append({
-            "date": date,
-            "merchant": merchant,
-            "type": txn_type,
+        append({
+            "date": date.strip(),
+            "merchant": normalize_ws(match.group(1)),
+            "type": match.group(2).strip(),
             "amount": amount,
             "platform": "PhonePe"
         })
 
     return transactions
 
+# PDF processing jobs; run by an RQ worker when a queue is configured
+def process_phonepe_job(pdf_bytes: bytes) -> Dict[str, Any]:
+    """Extract PhonePe transactions from uploaded PDF bytes."""
+    # Extract selectable text, or OCR the same document if it is scanned
+    has_text, text_data = extract_pdf_text(pdf_bytes)
+    processing_method = "text_extraction" if has_text else "ocr"
+
+    # Parse transactions
+    transactions = parse_phonepe_transactions(text_data)
+
+    return {
+        "success": True,
+        "transactions": transactions,
+        "total_transactions": len(transactions),
+        "processing_method": processing_method,
+        "platform": "PhonePe"
+    }
+
+def process_paytm_job(pdf_bytes: bytes) -> Dict[str, Any]:
+    """Extract Paytm transactions from uploaded PDF bytes."""
+    has_text, text_data = paytm_extract_pdf_text(pdf_bytes)
+    
+    transactions = parse_paytm_transactions(text_data)
+    
+    # Add platform info
+    for transaction in transactions:
+        transaction['platform'] = 'Paytm'
+
+    return {
+        "success": True,
+        "transactions": transactions,
+        "total_transactions": len(transactions),
+        "platform": "Paytm"
+    }
+
+def run_upload_job(job_func, file_bytes: bytes):
+    """Enqueue an upload job when a worker queue is configured, else run it inline."""
+    if task_queue is not None:
+        job = task_queue.enqueue(job_func, file_bytes, meta={'user_id': current_user.id})
+        return jsonify({"success": True, "job_id": job.id, "status": job.get_status()}), 202
+    return jsonify(job_func(file_bytes))
+
 @app.route('/api/process-paytm-pdf', methods=['POST'])
 @login_required
 def process_paytm_pdf():
@@ -461,33 +537,31 @@ def process_paytm_pdf():
         return jsonify({"error": "Invalid file"}), 400
 
     try:
-        temp_path = f"temp_{current_user.id}_{file.filename}"
-        file.save(temp_path)
-
-        has_text, extracted_text = paytm_is_text_based(temp_path)
-        text_data = extracted_text if has_text else paytm_ocr_pdf(temp_path)
-        
-        transactions = parse_paytm_transactions(text_data)
-        
-        # Add platform info
-        for transaction in transactions:
-            transaction['platform'] = 'Paytm'
-
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-
-        return jsonify({
-            "success": True,
-            "transactions": transactions,
-            "total_transactions": len(transactions),
-            "platform": "Paytm"
-        })
+        # Process the upload in memory (no temp file round-trip)
+        return run_upload_job(process_paytm_job, file.read())
 
     except Exception as e:
-        if 'temp_path' in locals() and os.path.exists(temp_path):
-            os.remove(temp_path)
         return jsonify({"error": f"Processing failed: {str(e)}"}), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_job_status(job_id):
+    """Get the status (and result, once finished) of a queued PDF job."""
+    if task_queue is None:
+        return jsonify({"error": "Background processing is not enabled"}), 404
+
+    # Only the user who uploaded the file may see its job
+    job = task_queue.fetch_job(job_id)
+    if job is None or job.meta.get('user_id') != current_user.id:
+        return jsonify({"error": "Job not found"}), 404
+
+    response = {"job_id": job.id, "status": job.get_status()}
+    if job.is_finished:
+        response["result"] = job.result
+    elif job.is_failed:
+        response["error"] = "Processing failed"
+    return jsonify(response)
+
 # Health check
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -498,10 +572,14 @@ def health_check():
         "message": "Backend is running successfully!"
     })
 
+# Create the schema and open the pooled connections at import time, so the
+# app is ready under a WSGI server too:
+#   gunicorn -c gunicorn.conf.py backend_auth:app
+init_database()
+pool.fill()
+
 if __name__ == '__main__':
     print("🚀 Starting Expense Tracker Backend with Local Authentication...")
-    print("📝 Initializing SQLite database...")
-    init_database()
     print("✅ Database initialized successfully!")
     print("📝 Available endpoints:")
     print("   - POST /api/auth/register - Register new user")
@@ -512,8 +590,11 @@ if __name__ == '__main__':
     print("   - POST /api/transactions - Add transactions")
     print("   - POST /api/process-phonepe-pdf - Process PhonePe PDF")
     print("   - POST /api/process-paytm-pdf - Process Paytm PDF")
+    print("   - GET  /api/jobs/<id> - Get queued PDF job status")
     print("   - GET  /api/health - Health check")
     print("🌐 Server will be available at: http://localhost:5000")
     print("🔐 Authentication: Local SQLite with Flask-Login")
     print("💾 Database: SQLite (expense_tracker.db)")
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Development server only; debug (and its reloader) is opt-in
+    debug = os.environ.get('FLASK_ENV') == 'development'
+    app.run(host='0.0.0.0', port=5000, debug=debug)
@@ -0,0 +1,31 @@
+import hashlib
+import threading
+
+from cachetools import LRUCache
+
+
+def content_key(prefix: str, data: bytes) -> str:
+    """Cache key for a result derived from ``data`` alone."""
+    return f"{prefix}:{hashlib.sha256(data).hexdigest()}"
+
+
+class ContentCache:
+    """Bounded in-process LRU for results keyed by content (see content_key).
+
+    A content key's value never changes, so unlike per-user listings these
+    per-process copies never need invalidating across workers. get/set match
+    Flask-Caching's, so this can stand in when no shared backend is configured.
+    """
+
+    def __init__(self, max_entries: int):
+        self._entries = LRUCache(maxsize=max_entries)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def set(self, key, value, timeout=None):
+        # Entries only leave by LRU eviction; content-keyed values don't go stale
+        with self._lock:
+            self._entries[key] = value
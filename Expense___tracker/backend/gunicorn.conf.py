@@ -0,0 +1,15 @@
+# Gunicorn settings, picked up automatically by `gunicorn app:app`
+# (startup.sh, render.yaml) when run from this directory.
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Processes let concurrent OCR uploads use separate cores; threads keep the
+# I/O-bound API routes responsive while a worker is busy with one.
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Scanned statements can take well over the default 30s to OCR
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
@@ -0,0 +1,99 @@
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import fitz  # PyMuPDF
+import pytesseract
+from PIL import Image
+
+# Prefer tesserocr, which keeps a Tesseract instance (and its loaded language
+# model) alive in-process; fall back to pytesseract, which spawns the
+# tesseract binary and reloads the model for every page.
+try:
+    from tesserocr import PyTessBaseAPI, OEM, PSM
+except ImportError:
+    PyTessBaseAPI = None
+
+
+OCR_LANG = 'eng'
+# LSTM engine only, and treat each page as a single uniform block of text
+OCR_TESSERACT_CONFIG = '--oem 1 --psm 6'
+# 200 DPI grayscale keeps printed statements legible for Tesseract with
+# ~2.25x fewer pixels than 300 DPI RGB
+OCR_DPI = 200
+# Pages larger than A4 (which is just under this at 200 DPI) are rendered at
+# a lower resolution so Tesseract's input stays bounded, but never below
+# OCR_MIN_DPI, under which recognition accuracy drops off sharply
+OCR_MAX_PIXELS = 4_000_000
+OCR_MIN_DPI = 150
+
+# A PyTessBaseAPI must not be shared between threads, so each OCR worker
+# thread lazily gets its own. The pool is process-wide and long-lived so
+# those handles (and their loaded models) are reused across requests rather
+# than reloaded by a fresh pool on every upload.
+_local = threading.local()
+_ocr_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='ocr')
+
+
+def _tess_api():
+    api = getattr(_local, 'api', None)
+    if api is None:
+        api = PyTessBaseAPI(lang=OCR_LANG, oem=OEM.LSTM_ONLY, psm=PSM.SINGLE_BLOCK)
+        _local.api = api
+    return api
+
+
+def image_to_text(img) -> str:
+    """OCR a single page image (a PIL image)."""
+    if PyTessBaseAPI is None:
+        return pytesseract.image_to_string(img, lang=OCR_LANG, config=OCR_TESSERACT_CONFIG)
+    api = _tess_api()
+    api.SetImage(img)
+    return api.GetUTF8Text()
+
+
+def ocr_dpi(page) -> int:
+    """Render resolution for a page: OCR_DPI, scaled down for oversized pages."""
+    # Page size is in points (1/72 inch)
+    pixels = (page.rect.width * OCR_DPI / 72) * (page.rect.height * OCR_DPI / 72)
+    if pixels <= OCR_MAX_PIXELS:
+        return OCR_DPI
+    return max(OCR_MIN_DPI, int(OCR_DPI * math.sqrt(OCR_MAX_PIXELS / pixels)))
+
+
+def render_page(page):
+    """Render a PDF page to an 8-bit grayscale PIL image for OCR."""
+    pix = page.get_pixmap(dpi=ocr_dpi(page), colorspace=fitz.csGRAY)
+    # Wrap the raw samples directly instead of a PNG encode/decode round-trip
+    return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+
+
+def ocr_pages(pages) -> List[str]:
+    """OCR PDF pages (of a still-open document), one text per page."""
+    images = [render_page(page) for page in pages]
+    # Tesseract releases the GIL (tesserocr) or runs as a subprocess
+    # (pytesseract), so threads are enough to keep every core busy
+    return list(_ocr_executor.map(image_to_text, images))
+
+
+def _plain_page_text(page) -> str:
+    return page.get_text("text")
+
+
+def pdf_page_texts(doc, page_text=None) -> tuple[List[str], int]:
+    """Text of each page of an open PDF, OCRing only pages without selectable text.
+
+    ``page_text`` extracts a page's selectable text (plain get_text by
+    default). Returns the page texts and the number of pages that had to be
+    OCRed.
+    """
+    if page_text is None:
+        page_text = _plain_page_text
+    pages = list(doc)
+    page_texts = [page_text(page) for page in pages]
+    missing = [page_num for page_num, text in enumerate(page_texts) if not text.strip()]
+    for page_num, ocr_text in zip(missing, ocr_pages(pages[page_num] for page_num in missing)):
+        page_texts[page_num] = ocr_text
+    return page_texts, len(missing)
@@ -1,48 +1,103 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import fitz  # PyMuPDF
-import pytesseract
-from pdfminer.high_level import extract_text
-from PIL import Image
-import io
-import re
+import logging
+import orjson
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
+
+from regex_cache import (
+    PAYTM_DATE_RE, PAYTM_TIME_RE, PAYTM_PARTY_RE, PAYTM_AMOUNT_RE,
+    PAYTM_FALLBACK_RE, PAYTM_MERCHANT_TAIL_RE, normalize_ws
+)
+from ocr_engine import pdf_page_texts
+from upload_request import InMemoryUploadRequest
+from content_cache import ContentCache, content_key
 
 app = Flask(__name__)
+app.request_class = InMemoryUploadRequest
 CORS(app)  # Enable CORS for all routes
+# Uploads are buffered in memory; reject anything larger than a statement
+# could reasonably be (Werkzeug answers 413)
+app.config['MAX_CONTENT_LENGTH'] = 32 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def json_response(obj, status: int = 200):
+    """Build a JSON response with orjson."""
+    return app.response_class(orjson.dumps(obj), status=status, mimetype='application/json')
+
+
+# Blocks whose vertical extents overlap by more than this many points are
+# cells of the same table row, even when a larger font shifts one cell's top
+ROW_OVERLAP_TOLERANCE = 2
+
+
+def page_text_rows(page) -> str:
+    """A page's text blocks in reading order (row by row, left to right).
+
+    Statement tables are often written column by column, so plain
+    get_text("text") can emit a row's date, party and amount far apart.
+    Blocks are grouped into rows by vertical overlap, then each row is read
+    left to right, which puts each row back together.
+    """
+    blocks = sorted((b for b in page.get_text("blocks") if b[6] == 0),  # skip image blocks
+                    key=lambda b: b[1])
+    rows = []
+    row_bottom = None
+    for block in blocks:
+        if rows and block[1] < row_bottom - ROW_OVERLAP_TOLERANCE:
+            rows[-1].append(block)
+            row_bottom = max(row_bottom, block[3])
+        else:
+            rows.append([block])
+            row_bottom = block[3]
+    return "\n".join(block[4] for row in rows for block in sorted(row, key=lambda b: b[0]))
+
+
+def extract_pdf_text(pdf: Union[str, bytes]) -> tuple[bool, str]:
+    """Extract PDF text, OCRing only the pages without selectable text.
+
+    ``pdf`` is a file path or the PDF's bytes. Returns whether the PDF had
+    any selectable text, and the extracted text.
+    """
+    if isinstance(pdf, (bytes, bytearray)):
+        doc = fitz.open(stream=pdf, filetype="pdf")
+    else:
+        doc = fitz.open(pdf)
+    with doc:
+        page_texts, ocr_count = pdf_page_texts(doc, page_text_rows)
+    return ocr_count < len(page_texts), "\n".join(page_texts).strip()
 
 
-def is_text_based(pdf_path: str) -> tuple[bool, str]:
-    """Check if PDF contains selectable text."""
-    text = extract_text(pdf_path)
-    return bool(text.strip()), text.strip()
+# Recent extractions keyed by the PDF's content, since a statement is often
+# sent to /debug-text and then /process-paytm-pdf
+EXTRACTION_CACHE_MAX_ENTRIES = 32
+_extraction_cache = ContentCache(EXTRACTION_CACHE_MAX_ENTRIES)
 
 
-def ocr_pdf(pdf_path: str) -> str:
-    """Extract text from a scanned PDF using OCR."""
-    doc = fitz.open(pdf_path)
-    all_text = []
-    for page_num in range(len(doc)):
-        pix = doc[page_num].get_pixmap(dpi=300)
-        img = Image.open(io.BytesIO(pix.tobytes("png")))
-        text = pytesseract.image_to_string(img, lang="eng")
-        all_text.append(text)
-    return "\n".join(all_text)
+def extract_pdf_text_cached(pdf_bytes: bytes) -> tuple[bool, str]:
+    """extract_pdf_text for uploaded bytes, reusing the result for repeat uploads."""
+    key = content_key('paytm-text', pdf_bytes)
+    result = _extraction_cache.get(key)
+    if result is None:
+        result = extract_pdf_text(pdf_bytes)
+        _extraction_cache.set(key, result)
+    return result
 
 
 def parse_paytm_transactions(text: str) -> List[Dict[str, Any]]:
     """Extract date, merchant, type, and amount from Paytm PDF text."""
     transactions = []
     
-    print(f"\n===== PAYTM PARSER DEBUG =====")
-    print(f"Input text length: {len(text)} characters")
-    print("First 1500 characters:")
-    print(text[:1500])
-    print("===============================\n")
+    logger.debug("Parsing Paytm text (%d characters)", len(text))
 
     # Split text into lines for easier processing
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    lines = [line for line in map(str.strip, text.split('\n')) if line]
+    # Match the date pattern once per line; the block scans below reuse it.
+    # Dates start the line, so only lines starting with a digit reach the regex
+    date_matches = [PAYTM_DATE_RE.search(line) if line[0].isdigit() else None for line in lines]
     
     # Look for transaction blocks - each starts with a date
     i = 0
@@ -50,26 +105,23 @@ def parse_paytm_transactions(text: str) -> List[Dict[str, Any]]:
         line = lines[i]
         
         # Check if this line contains a date pattern (15 Jul, 10 Jul, etc.)
-        date_match = re.search(r'^(\d{1,2}\s+[A-Za-z]{3})', line)
+        date_match = date_matches[i]
         if date_match:
-            print(f"\n--- Found date line: '{line}' ---")
-            
             # Extract date
             date = date_match.group(1).strip()
             
             # Look for time in the same line or next line
+            # (a substring check first: a time always contains ':')
             time = ""
-            time_match = re.search(r'(\d{1,2}:\d{2}\s+[AP]M)', line)
+            time_match = ':' in line and PAYTM_TIME_RE.search(line)
             if time_match:
                 time = time_match.group(1)
             elif i + 1 < len(lines):
-                time_match = re.search(r'(\d{1,2}:\d{2}\s+[AP]M)', lines[i + 1])
+                time_match = ':' in lines[i + 1] and PAYTM_TIME_RE.search(lines[i + 1])
                 if time_match:
                     time = time_match.group(1)
                     i += 1  # Skip the time line
             
-            print(f"Date: {date}, Time: {time}")
-            
             # Look for "Paid to" or "Received from" in subsequent lines
             merchant = ""
             transaction_type = "DEBIT"  # Default
@@ -80,11 +132,12 @@ def parse_paytm_transactions(text: str) -> List[Dict[str, Any]]:
                 current_line = lines[j]
                 
                 # Look for "Paid to" or "Received from"
-                paid_match = re.search(r'(?:Paid to|Received from)\s+(.+)', current_line)
+                if 'Paid to' not in current_line and 'Received from' not in current_line:
+                    continue
+                paid_match = PAYTM_PARTY_RE.search(current_line)
                 if paid_match:
                     merchant = paid_match.group(1).strip()
                     transaction_type = "DEBIT" if "Paid to" in current_line else "CREDIT"
-                    print(f"Found merchant: '{merchant}', type: {transaction_type}")
                     break
             
             # Search for amount in the remaining lines until we hit another date or end
@@ -92,17 +145,18 @@ def parse_paytm_transactions(text: str) -> List[Dict[str, Any]]:
                 current_line = lines[j]
                 
                 # Stop if we hit another date (start of next transaction)
-                if re.search(r'^\d{1,2}\s+[A-Za-z]{3}', current_line) and j != i + 1:
+                if date_matches[j] and j != i + 1:
                     break
                 
-                # Look for amount pattern
-                amount_match = re.search(r'[-+]?\s*Rs\.(\d+(?:\.\d{2})?)', current_line)
+                # Look for amount pattern (only lines mentioning "Rs." can match)
+                if 'Rs.' not in current_line:
+                    continue
+                amount_match = PAYTM_AMOUNT_RE.search(current_line)
                 if amount_match:
                     amount = float(amount_match.group(1))
                     # Check if it's negative (debit)
-                    if '-' in current_line.split('Rs.')[0]:
+                    if '-' in current_line[:current_line.find('Rs.')]:
                         transaction_type = "DEBIT"
-                    print(f"Found amount: {amount}, line: '{current_line}'")
                     break
             
             # If we found all required info, add the transaction
@@ -115,38 +169,24 @@ def parse_paytm_transactions(text: str) -> List[Dict[str, Any]]:
                     "time": time
                 }
                 transactions.append(transaction)
-                print(f"✅ Added transaction: {transaction}")
-            else:
-                print(f"❌ Incomplete transaction - merchant: '{merchant}', amount: {amount}")
         
         i += 1
     
-    # Fallback: Try a more aggressive regex approach if we didn't find enough
-    if len(transactions) < 3:  # We expect 3 transactions based on your image
-        print("\n=== TRYING FALLBACK REGEX APPROACH ===")
-        
-        # More comprehensive pattern that captures the entire transaction block
-        pattern = re.compile(
-            r'(\d{1,2}\s+[A-Za-z]{3})\s*(\d{1,2}:\d{2}\s+[AP]M)?\s*(?:.*?)?Paid to\s+([^U\n]+?)(?:\s*UPI ID:.*?)?(?:\s*UPI Ref No:.*?)?.*?[-]\s*Rs\.(\d+(?:\.\d{2})?)',
-            re.DOTALL | re.IGNORECASE
-        )
-        
-        matches = pattern.findall(text)
-        print(f"Fallback regex found {len(matches)} matches")
-        
-        # Clear previous results and use regex results
-        transactions.clear()
+    # Fallback: a whole-text regex sweep, only when the line pass found
+    # nothing (e.g. OCR output whose line breaks don't follow the layout)
+    if not transactions:
+        logger.debug("Line pass found no transactions; trying fallback regex")
         
-        for match in matches:
+        # Comprehensive pattern that captures the entire transaction block
+        for match in PAYTM_FALLBACK_RE.finditer(text):
             try:
-                date = match[0].strip()
-                time = match[1].strip() if match[1] else ""
-                merchant = re.sub(r'\s+', ' ', match[2]).strip()
-                amount = float(match[3])
+                date = match.group(1).strip()
+                time = match.group(2).strip() if match.group(2) else ""
+                amount = float(match.group(4))
                 
-                # Clean merchant name
-                merchant = merchant.split('\n')[0].strip()  # Take first line only
-                merchant = re.sub(r'\s*(UPI ID:|Note:|Tag:).*$', '', merchant, flags=re.IGNORECASE)
+                # Clean merchant name: the capture never spans lines, so one
+                # whitespace collapse and one tail strip are enough
+                merchant = PAYTM_MERCHANT_TAIL_RE.sub('', normalize_ws(match.group(3)))
                 
                 transaction = {
                     "date": f"{date} 2025",
@@ -156,48 +196,12 @@ def parse_paytm_transactions(text: str) -> List[Dict[str, Any]]:
                     "time": time
                 }
                 transactions.append(transaction)
-                print(f"✅ Fallback added: {transaction}")
                 
             except (ValueError, IndexError) as e:
-                print(f"Error in fallback processing: {e}")
+                logger.debug("Skipping fallback match: %s", e)
                 continue
     
-    # Final fallback: manual extraction based on known structure
-    if len(transactions) < 3:
-        print("\n=== TRYING MANUAL EXTRACTION ===")
-        transactions.clear()
-        
-        # Expected transactions from your image
-        expected_transactions = [
-            {"date": "15 Jul", "merchant": "Airtel", "amount": 22},
-            {"date": "15 Jul", "merchant": "SKVerse", "amount": 199},
-            {"date": "10 Jul", "merchant": "Www Airtel In", "amount": 77}
-        ]
-        
-        for expected in expected_transactions:
-            # Try to find this transaction in the text
-            date_pattern = expected["date"]
-            merchant_pattern = expected["merchant"]
-            amount_pattern = str(expected["amount"])
-            
-            # Check if all components exist in the text
-            if (date_pattern in text and 
-                merchant_pattern in text and 
-                f"Rs.{amount_pattern}" in text):
-                
-                transaction = {
-                    "date": f"{date_pattern} 2025",
-                    "merchant": merchant_pattern,
-                    "type": "DEBIT",
-                    "amount": float(expected["amount"]),
-                    "time": ""
-                }
-                transactions.append(transaction)
-                print(f"✅ Manual extraction added: {transaction}")
-    
-    print(f"\n🎯 FINAL RESULT: {len(transactions)} transactions extracted")
-    for i, tx in enumerate(transactions):
-        print(f"Transaction {i+1}: {tx}")
+    logger.debug("Extracted %d Paytm transactions", len(transactions))
     
     return transactions
 
@@ -217,38 +221,17 @@ def process_paytm_pdf():
         return jsonify({"error": "File must be a PDF"}), 400
 
     try:
-        # Save uploaded file temporarily
-        temp_path = f"temp_paytm_{file.filename}"
-        file.save(temp_path)
-
-        # Check if PDF is text-based or scanned
-        has_text, extracted_text = is_text_based(temp_path)
+        # Process the upload in memory (no temp file round-trip)
+        # Extract selectable text, or OCR the same document if it is scanned
+        has_text, text_data = extract_pdf_text_cached(file.read())
+        processing_method = "text_extraction" if has_text else "ocr"
 
-        if has_text:
-            text_data = extracted_text
-            processing_method = "text_extraction"
-        else:
-            text_data = ocr_pdf(temp_path)
-            processing_method = "ocr"
-
-        # Debug output
-        print("\n===== DEBUG: EXTRACTED TEXT =====")
-        print(f"Processing method: {processing_method}")
-        print(f"Text length: {len(text_data)} characters")
-        print("First 1000 characters:")
-        print(text_data[:1000])
-        print("Last 500 characters:")
-        print(text_data[-500:] if len(text_data) > 500 else text_data)
-        print("==================================\n")
+        logger.debug("Extracted %d characters (%s)", len(text_data), processing_method)
 
         # Parse transactions
         transactions = parse_paytm_transactions(text_data)
 
-        # Clean up temp file
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-
-        return jsonify({
+        return json_response({
             "success": True,
             "transactions": transactions,
             "total_transactions": len(transactions),
@@ -257,8 +240,6 @@ def process_paytm_pdf():
         })
 
     except Exception as e:
-        if 'temp_path' in locals() and os.path.exists(temp_path):
-            os.remove(temp_path)
         return jsonify({"error": f"Processing failed: {str(e)}"}), 500
 
 
@@ -323,6 +304,9 @@ def test_parsing():
     })
 
 
+DEBUG_TEXT_LIMIT = 50000
+
+
 @app.route('/debug-text', methods=['POST'])
 def debug_text():
     """Debug endpoint to see exactly what text is extracted from PDF."""
@@ -332,25 +316,21 @@ def debug_text():
     file = request.files['file']
     
     try:
-        temp_path = f"debug_paytm_{file.filename}"
-        file.save(temp_path)
-        
-        # Extract text
-        has_text, extracted_text = is_text_based(temp_path)
-        
-        if not has_text:
-            extracted_text = ocr_pdf(temp_path)
-        
-        # Clean up
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-        
-        return jsonify({
+        # Extract text from the upload in memory
+        has_text, extracted_text = extract_pdf_text_cached(file.read())
+
+        # ?format=text returns the whole extraction as plain text; the JSON
+        # view is capped so multi-MB OCR output isn't escaped into it
+        if request.args.get('format') == 'text':
+            return app.response_class(extracted_text, mimetype='text/plain')
+
+        return json_response({
             "success": True,
             "has_selectable_text": has_text,
             "text_length": len(extracted_text),
-            "full_text": extracted_text,
-            "lines": extracted_text.split('\n')[:50]  # First 50 lines
+            "full_text": extracted_text[:DEBUG_TEXT_LIMIT],
+            "truncated": len(extracted_text) > DEBUG_TEXT_LIMIT,
+            "lines": extracted_text.split('\n', 50)[:50]  # First 50 lines
         })
         
     except Exception as e:
@@ -361,10 +341,13 @@ if __name__ == '__main__':
     print("💳 Starting IMPROVED Paytm PDF Processor Backend...")
     print("📝 Available endpoints:")
     print("   - POST /process-paytm-pdf - Process Paytm PDF files")
-    print("   - POST /debug-text - Debug text extraction")
+    print("   - POST /debug-text - Debug text extraction (?format=text for the full text)")
     print("   - GET  /health - Health check")
     print("   - GET  /test - Test parsing with sample Paytm data")
     print("🌐 Server will be available at: http://localhost:5001")
     print("🔗 Frontend should connect to: http://localhost:5001")
     print("🎯 This version should extract all 3 transactions from your Paytm PDF!")
-    app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
+    # Development server only; in production run under gunicorn, e.g.
+    #   PORT=5001 gunicorn -c gunicorn.conf.py paytmapp:app
+    debug = os.environ.get('FLASK_ENV') == 'development'
+    app.run(host='0.0.0.0', port=5001, debug=debug)
\ No newline at end of file
@@ -0,0 +1,71 @@
+import re
+
+# Prefer RE2 (linear-time DFA matching) for transaction parsing; fall back to
+# the stdlib engine when google-re2 is not installed.
+try:
+    import re2 as re_fast
+except ImportError:
+    re_fast = re
+
+
+# PhonePe patterns. Records are located by their leading date in one linear
+# RE2 finditer pass, then each record body is matched within its own bounds so
+# the merchant capture can never backtrack across neighbouring transactions.
+PHONEPE_DATE_RE = re_fast.compile(r'([A-Za-z]{3}\s+\d{1,2},\s+\d{4})')
+# The rupee sign may arrive as "₹", as its UTF-8 mojibake "â‚¹", or spelled
+# out as "Rs."; accept all three so an encoding mismatch doesn't drop every row.
+# This stays on the stdlib engine: google-re2's match(text, pos, endpos)
+# re-encodes the whole text on every call, which would make matching one span
+# per record quadratic, while the span bounds already keep backtracking local.
+PHONEPE_BODY_RE = re.compile(
+    r'(?s)\s+(?:Paid to|Received from)\s+(.+?)\s+(DEBIT|CREDIT)\s+(?:₹|â‚¹|Rs\.?)\s*([\d,]+(?:\.\d{1,2})?)'
+)
+
+
+def _match_phonepe_body(text: str, start: int, end: int):
+    """Match a record body in text[start:end], if it can contain one."""
+    # Cheap C-level substring check first, so header/footer/page-number
+    # spans between dates never reach the regex engine
+    if text.find('Paid to', start, end) == -1 and text.find('Received from', start, end) == -1:
+        return None
+    return PHONEPE_BODY_RE.match(text, start, end)
+
+
+def iter_phonepe_records(text: str):
+    """Lazily yield (date, body_match) for each PhonePe record in the text.
+
+    Each record body is matched between its date and the next date, so only
+    one pair of matches is alive at a time.
+    """
+    if 'Paid to' not in text and 'Received from' not in text:
+        return
+    prev = None
+    for date_match in PHONEPE_DATE_RE.finditer(text):
+        if prev is not None:
+            body = _match_phonepe_body(text, prev.end(), date_match.start())
+            if body:
+                yield prev.group(1), body
+        prev = date_match
+    if prev is not None:
+        body = _match_phonepe_body(text, prev.end(), len(text))
+        if body:
+            yield prev.group(1), body
+
+
+# Paytm patterns. The per-line patterns run on short strings, where the
+# stdlib engine has lower call overhead than RE2.
+PAYTM_DATE_RE = re.compile(r'^(\d{1,2}\s+[A-Za-z]{3})')
+PAYTM_TIME_RE = re.compile(r'(\d{1,2}:\d{2}\s+[AP]M)')
+PAYTM_PARTY_RE = re.compile(r'(?:Paid to|Received from)\s+(.+)')
+PAYTM_AMOUNT_RE = re.compile(r'[-+]?\s*Rs\.(\d+(?:\.\d{2})?)')
+# The fallback scans the whole (possibly large OCR) text with lazy wildcards,
+# so it uses the linear-time engine; flags are inlined for RE2 compatibility.
+PAYTM_FALLBACK_RE = re_fast.compile(
+    r'(?si)(\d{1,2}\s+[A-Za-z]{3})\s*(\d{1,2}:\d{2}\s+[AP]M)?\s*(?:.*?)?Paid to\s+([^U\n]+?)(?:\s*UPI ID:.*?)?(?:\s*UPI Ref No:.*?)?.*?[-]\s*Rs\.(\d+(?:\.\d{2})?)'
+)
+PAYTM_MERCHANT_TAIL_RE = re.compile(r'\s*(UPI ID:|Note:|Tag:).*$', re.IGNORECASE)
+
+
+def normalize_ws(value: str) -> str:
+    """Collapse runs of whitespace to single spaces and trim the ends."""
+    return ' '.join(value.split())
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The backend modules are imported as top-level modules (as gunicorn does
+# when started from the backend directory)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
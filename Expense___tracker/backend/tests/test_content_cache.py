@@ -0,0 +1,19 @@
+from content_cache import ContentCache, content_key
+
+
+def test_content_key_depends_on_prefix_and_bytes():
+    assert content_key('a', b'pdf') == content_key('a', b'pdf')
+    assert content_key('a', b'pdf') != content_key('b', b'pdf')
+    assert content_key('a', b'pdf') != content_key('a', b'other')
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ContentCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
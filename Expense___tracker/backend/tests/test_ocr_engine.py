@@ -0,0 +1,27 @@
+import fitz
+
+from ocr_engine import OCR_DPI, OCR_MAX_PIXELS, OCR_MIN_DPI, ocr_dpi, render_page
+
+
+def _page(width_in: float, height_in: float):
+    doc = fitz.open()
+    return doc, doc.new_page(width=width_in * 72, height=height_in * 72)
+
+
+def test_a4_renders_at_full_resolution():
+    doc, page = _page(8.27, 11.69)
+    assert ocr_dpi(page) == OCR_DPI
+
+
+def test_legal_page_is_scaled_to_the_pixel_budget():
+    doc, page = _page(8.5, 14)
+    dpi = ocr_dpi(page)
+
+    assert OCR_MIN_DPI <= dpi < OCR_DPI
+    img = render_page(page)
+    assert img.width * img.height <= OCR_MAX_PIXELS
+
+
+def test_resolution_never_drops_below_the_minimum():
+    doc, page = _page(16.5, 23.4)  # A2
+    assert ocr_dpi(page) == OCR_MIN_DPI
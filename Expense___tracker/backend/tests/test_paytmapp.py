@@ -0,0 +1,35 @@
+import fitz
+
+from paytmapp import extract_pdf_text, parse_paytm_transactions
+
+
+def _statement_pdf(amount_offset: float) -> bytes:
+    """Two Paytm rows; the amount cell uses a larger font, shifting its top."""
+    doc = fitz.open()
+    page = doc.new_page()
+    rows = (
+        (100, '15 Jul', '8:02 PM', 'Paid to Airtel', '- Rs.22'),
+        (160, '10 Jul', '10:40 AM', 'Paid to SKVerse', '- Rs.199'),
+    )
+    for y, date, time, party, amount in rows:
+        page.insert_text((40, y), date, fontsize=10)
+        page.insert_text((40, y + 12), time, fontsize=8)
+        page.insert_text((150, y), party, fontsize=10)
+        page.insert_text((420, y + amount_offset), amount, fontsize=14)
+    return doc.tobytes()
+
+
+def test_misaligned_cells_stay_in_their_rows():
+    has_text, text = extract_pdf_text(_statement_pdf(amount_offset=1))
+
+    assert has_text
+    assert parse_paytm_transactions(text) == [
+        {"date": "15 Jul 2025", "merchant": "Airtel", "type": "DEBIT", "amount": 22.0, "time": "8:02 PM"},
+        {"date": "10 Jul 2025", "merchant": "SKVerse", "type": "DEBIT", "amount": 199.0, "time": "10:40 AM"},
+    ]
+
+
+def test_larger_font_amount_on_the_same_baseline():
+    _, text = extract_pdf_text(_statement_pdf(amount_offset=0))
+
+    assert [t["amount"] for t in parse_paytm_transactions(text)] == [22.0, 199.0]
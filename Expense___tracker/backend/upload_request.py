@@ -0,0 +1,15 @@
+import io
+
+from flask import Request
+
+
+class InMemoryUploadRequest(Request):
+    """Request that buffers uploaded files in memory.
+
+    Werkzeug spools uploads over 500KB to a temporary file, which the routes
+    then read straight back into memory. Uploads are already capped by
+    MAX_CONTENT_LENGTH, so keep them in a BytesIO and skip the disk round trip.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return io.BytesIO()
@@ -193,7 +193,7 @@ const GPayProcessor: React.FC = () => {
       return {
         transactions: processedTransactions,
         errors: [],
-        warnings: data.processing_method === 'ocr' ? ['PDF processed using OCR - accuracy may vary'] : []
+        warnings: ['ocr', 'mixed'].includes(data.processing_method) ? ['PDF processed using OCR - accuracy may vary'] : []
       };
 
     } catch (error) {
@@ -162,7 +162,7 @@ const PaytmProcessor: React.FC = () => {
         warnings: [
           `Processing method: ${data.processing_method}`,
           `Found ${data.total_transactions} transactions`,
-          ...(data.processing_method === 'ocr' ? ['PDF processed using OCR - accuracy may vary'] : [])
+          ...(['ocr', 'mixed'].includes(data.processing_method) ? ['PDF processed using OCR - accuracy may vary'] : [])
         ]
       };
 
@@ -155,7 +155,7 @@ const SuperMoneyProcessor: React.FC = () => {
       return {
         transactions: processedTransactions,
         errors: [],
-        warnings: data.processing_method === 'ocr' ? ['PDF processed using OCR - accuracy may vary'] : []
+        warnings: ['ocr', 'mixed'].includes(data.processing_method) ? ['PDF processed using OCR - accuracy may vary'] : []
       };
 
     } catch (error) {
@@ -9,6 +9,7 @@ const ENDPOINTS = {
   UPLOAD_FILE: '/upload-file',
   PROCESS_PHONEPE_PDF: '/process-phonepe-pdf',
   PROCESS_PAYTM_PDF: '/process-paytm-pdf',
+  JOB: (id: string) => `/jobs/${id}`,
   
   // Transactions
   TRANSACTIONS: '/api/transactions',
@@ -62,6 +63,31 @@ async function apiCall<T>(
   }
 }
 
+// When the backend runs uploads on its worker queue it answers 202 with a
+// job id instead of the result; poll the job until the result is ready
+const JOB_POLL_INTERVAL_MS = 1000
+const JOB_POLL_TIMEOUT_MS = 5 * 60 * 1000
+
+async function uploadResult(response: Response) {
+  const data = await response.json()
+  if (response.status !== 202 || !data.job_id) {
+    return data
+  }
+
+  const deadline = Date.now() + JOB_POLL_TIMEOUT_MS
+  while (Date.now() < deadline) {
+    await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS))
+    const job = await apiCall<{ status: string; result?: any; error?: string }>(ENDPOINTS.JOB(data.job_id))
+    if (job.status === 'finished') {
+      return job.result
+    }
+    if (job.status === 'failed' || job.status === 'stopped' || job.status === 'canceled') {
+      throw new Error(job.error || 'Processing failed')
+    }
+  }
+  throw new Error('Processing timed out')
+}
+
 export class ApiService {
   // File Processing Methods
   static async uploadFile(file: File, fileType: 'pdf' | 'excel' | 'csv') {
@@ -80,7 +106,7 @@ export class ApiService {
       throw new Error(errorData.error || `Upload failed: ${response.status}`)
     }
     
-    return await response.json()
+    return uploadResult(response)
   }
 
   static async processPhonePePDF(file: File) {
@@ -99,7 +125,7 @@ export class ApiService {
       throw new Error(errorData.error || `PhonePe processing failed: ${response.status}`)
     }
     
-    return await response.json()
+    return uploadResult(response)
   }
 
   static async processPaytmPDF(file: File) {
@@ -118,7 +144,7 @@ export class ApiService {
       throw new Error(errorData.error || `Paytm processing failed: ${response.status}`)
     }
     
-    return await response.json()
+    return uploadResult(response)
   }
 
   // Transaction Methods